@@ -3,6 +3,7 @@ Analytics router for processing natural language questions
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from functools import lru_cache
 import logging
 
 from models.database import get_db
@@ -20,6 +21,20 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1", tags=["analytics"])
 
 
+@lru_cache(maxsize=1)
+def get_intent_classifier() -> IntentClassifier:
+    """
+    Get the shared IntentClassifier
+    
+    The classifier is store-independent, so one instance is reused across
+    requests to keep its question cache warm.
+    
+    Returns:
+        Shared IntentClassifier instance
+    """
+    return IntentClassifier(openai_service=OpenAIService())
+
+
 def create_agent(store: Store) -> ShopifyAnalyticsAgent:
     """
     Factory function to create ShopifyAnalyticsAgent with all dependencies
@@ -34,7 +49,7 @@ def create_agent(store: Store) -> ShopifyAnalyticsAgent:
     openai_service = OpenAIService()
     
     # Initialize all services with dependency injection
-    intent_classifier = IntentClassifier(openai_service=openai_service)
+    intent_classifier = get_intent_classifier()
     query_generator = ShopifyQLGenerator(openai_service=openai_service)
     shopify_client = ShopifyClient(
         shop_domain=store.shop_domain,
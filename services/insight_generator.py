@@ -2,14 +2,86 @@
 Insight Generator
 Analyzes query results and generates business insights using OpenAI GPT-4o-mini
 """
+import heapq
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+import re
+from array import array
+from collections import Counter
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, Iterable, List, Any, NamedTuple, Tuple, Union
 
 from services.openai_service import OpenAIService
 
 logger = logging.getLogger(__name__)
 
+# Data points needed for "high" confidence
+_HIGH_CONFIDENCE_DATA_POINTS = 30
+
+# Plain decimal prices with at most two fractional digits
+_PRICE_PATTERN = re.compile(r"(\d+)(?:\.(\d{0,2}))?")
+
+
+class FrequencyAnalysis(NamedTuple):
+    """Customer counts by order frequency segment"""
+    one_time: int
+    repeat: int
+    frequent: int
+    total: int
+    
+    def __getitem__(self, key):
+        """Support dict-style access by field name as well as tuple indexing"""
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
+@lru_cache(maxsize=512)
+def _confidence_from_count(data_points: int, min_data_points: int) -> str:
+    """Map a data point count to a confidence level"""
+    if data_points == 0 or data_points < min_data_points:
+        return "low"
+    if data_points < _HIGH_CONFIDENCE_DATA_POINTS:
+        return "medium"
+    return "high"
+
+
+def _bucket_confidences(counts: List[int], min_data_points: int) -> List[str]:
+    """Map many data point counts to confidence levels, reusing memoized lookups"""
+    return [_confidence_from_count(count, min_data_points) for count in counts]
+
+
+@lru_cache(maxsize=1024)
+def _price_to_cents(price: Any) -> int:
+    """
+    Convert a Shopify price (usually a string like "10.00") to integer cents
+    
+    Distinct prices are parsed once; revenue is then summed exactly in
+    integer cents instead of accumulating float rounding error.
+    """
+    if isinstance(price, str):
+        match = _PRICE_PATTERN.fullmatch(price.strip())
+        if match:
+            whole, fraction = match.groups()
+            return int(whole) * 100 + int((fraction or "").ljust(2, "0"))
+    return round(float(price) * 100)
+
+
+def _line_item_title(item: Dict[str, Any]) -> str:
+    """Grouping key for line items"""
+    return item.get("title", "Unknown")
+
+
+def _sum_line_items(items: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+    """Total quantity and revenue in cents over a run of line items"""
+    quantity_sold = 0
+    revenue_cents = 0
+    for item in items:
+        quantity = item.get("quantity", 0)
+        quantity_sold += quantity
+        revenue_cents += quantity * _price_to_cents(item.get("price", 0))
+    return quantity_sold, revenue_cents
+
 
 class InsightGenerator:
     """
@@ -19,6 +91,7 @@ class InsightGenerator:
     
     MIN_DATA_POINTS = 10
     MIN_DAYS_FOR_HIGH_CONFIDENCE = 7
+    SORTED_PROBE_SIZE = 32
     
     def __init__(self, openai_service: OpenAIService):
         """
@@ -47,10 +120,69 @@ class InsightGenerator:
         Returns:
             Dictionary with insights and metadata
         """
+        # Nothing to analyze: skip the LLM round-trip entirely
+        if not query_results:
+            return self._no_data_insights()
+        
         try:
             # Calculate confidence based on data quality
             confidence = self._determine_confidence(query_results)
-            
+        except Exception as e:
+            logger.error(f"Failed to generate insights: {e}")
+            return self._failed_insights()
+        
+        return self._insights_with_confidence(query_results, question, intent_type, confidence)
+    
+    def generate_insights_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate insights for several query results at once
+        
+        Confidence levels for the whole batch are bucketed in one pass; the
+        LLM is only called for items that have data.
+        
+        Args:
+            items: Dictionaries with query_results, question and intent_type keys
+        
+        Returns:
+            List of insight dictionaries, in the same order as items
+        """
+        counts = [len(item["query_results"]) for item in items]
+        confidences = _bucket_confidences(counts, self.MIN_DATA_POINTS)
+        
+        results = []
+        for item, count, confidence in zip(items, counts, confidences):
+            if count == 0:
+                results.append(self._no_data_insights())
+            else:
+                results.append(self._insights_with_confidence(
+                    item["query_results"],
+                    item["question"],
+                    item["intent_type"],
+                    confidence
+                ))
+        
+        return results
+    
+    def _insights_with_confidence(
+        self,
+        query_results: List[Dict[str, Any]],
+        question: str,
+        intent_type: str,
+        confidence: str
+    ) -> Dict[str, Any]:
+        """
+        Generate LLM insights for results whose confidence is already known
+        
+        Args:
+            query_results: Raw data from Shopify query
+            question: Original user question
+            intent_type: Type of intent
+            confidence: Precomputed confidence level
+        
+        Returns:
+            Dictionary with insights and metadata
+        """
+        try:
             # Generate insights using LLM
             insights = self._generate_insights_with_llm(query_results, question, intent_type)
             
@@ -62,18 +194,35 @@ class InsightGenerator:
         
         except Exception as e:
             logger.error(f"Failed to generate insights: {e}")
-            return {
-                "insights": "Unable to generate insights from the data.",
-                "confidence": "low",
-                "data_points": 0
-            }
+            return self._failed_insights()
+    
+    def _no_data_insights(self) -> Dict[str, Any]:
+        """Insight response for empty query results"""
+        return {
+            "insights": "No data was found for this question, so there is nothing to analyze yet.",
+            "confidence": "low",
+            "data_points": 0
+        }
+    
+    def _failed_insights(self) -> Dict[str, Any]:
+        """Fallback insight response when generation fails"""
+        return {
+            "insights": "Unable to generate insights from the data.",
+            "confidence": "low",
+            "data_points": 0
+        }
     
-    def calculate_sales_velocity(self, orders: List[Dict[str, Any]], days: int = 30) -> float:
+    def calculate_sales_velocity(
+        self,
+        orders: Union[List[Dict[str, Any]], array],
+        days: int = 30
+    ) -> float:
         """
         Calculate sales velocity (units per day)
         
         Args:
-            orders: List of order dictionaries
+            orders: List of order dictionaries, or a flat array.array of
+                line item quantities when they are already extracted
             days: Number of days to calculate over
         
         Returns:
@@ -82,10 +231,15 @@ class InsightGenerator:
         if not orders or days <= 0:
             return 0.0
         
-        total_quantity = sum(
-            sum(item.get("quantity", 0) for item in order.get("line_items", []))
-            for order in orders
-        )
+        if isinstance(orders, array):
+            total_quantity = sum(orders)
+        else:
+            # Single flat pass over all line items (no per-order intermediate sums)
+            total_quantity = sum(
+                item.get("quantity", 0)
+                for order in orders
+                for item in order.get("line_items", ())
+            )
         
         velocity = total_quantity / days
         logger.debug(f"Calculated sales velocity: {velocity:.2f} units/day")
@@ -106,35 +260,67 @@ class InsightGenerator:
         Returns:
             List of top products with metrics
         """
-        product_metrics = {}
-        
-        for order in orders:
-            for item in order.get("line_items", []):
-                product_title = item.get("title", "Unknown")
+        line_items = [item for order in orders for item in order.get("line_items", ())]
+        
+        # Accumulate [quantity_sold, revenue_cents] per title
+        totals: Dict[str, List[int]] = {}
+        
+        if self._titles_look_sorted(line_items):
+            # Sorted input: sum each run of equal titles, one dict update per run
+            for product_title, run in groupby(line_items, key=_line_item_title):
+                quantity_sold, revenue_cents = _sum_line_items(run)
+                entry = totals.get(product_title)
+                if entry is None:
+                    totals[product_title] = [quantity_sold, revenue_cents]
+                else:
+                    entry[0] += quantity_sold
+                    entry[1] += revenue_cents
+        else:
+            for item in line_items:
+                product_title = _line_item_title(item)
                 quantity = item.get("quantity", 0)
-                price = item.get("price", 0)
                 
-                if product_title not in product_metrics:
-                    product_metrics[product_title] = {
-                        "title": product_title,
-                        "quantity_sold": 0,
-                        "revenue": 0.0
-                    }
+                entry = totals.get(product_title)
+                if entry is None:
+                    entry = totals[product_title] = [0, 0]
                 
-                product_metrics[product_title]["quantity_sold"] += quantity
-                product_metrics[product_title]["revenue"] += quantity * float(price)
+                entry[0] += quantity
+                entry[1] += quantity * _price_to_cents(item.get("price", 0))
         
-        # Sort by revenue
-        top_products = sorted(
-            product_metrics.values(),
-            key=lambda x: x["revenue"],
-            reverse=True
-        )[:limit]
+        # Partial sort: only the top `limit` products are ordered by revenue
+        top = heapq.nlargest(limit, totals.items(), key=lambda kv: kv[1][1])
+        top_products = [
+            {"title": title, "quantity_sold": quantity_sold, "revenue": revenue_cents / 100}
+            for title, (quantity_sold, revenue_cents) in top
+        ]
         
         logger.debug(f"Identified {len(top_products)} top products")
         return top_products
     
-    def analyze_order_frequency(self, customers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _titles_look_sorted(self, line_items: List[Dict[str, Any]]) -> bool:
+        """
+        Probe whether line items arrive grouped by title
+        
+        Only a prefix is checked; the grouped path stays correct for any
+        input because repeated runs of a title are added together.
+        
+        Args:
+            line_items: Flattened line items
+        
+        Returns:
+            True if the probed prefix is sorted by title
+        """
+        probe = line_items[:self.SORTED_PROBE_SIZE]
+        try:
+            return all(
+                _line_item_title(a) <= _line_item_title(b)
+                for a, b in zip(probe, probe[1:])
+            )
+        except TypeError:
+            # Titles of mixed types cannot be ordered
+            return False
+    
+    def analyze_order_frequency(self, customers: List[Dict[str, Any]]) -> FrequencyAnalysis:
         """
         Analyze customer order frequency
         
@@ -142,21 +328,27 @@ class InsightGenerator:
             customers: List of customer dictionaries
         
         Returns:
-            Dictionary with frequency analysis
+            FrequencyAnalysis with one_time, repeat, frequent and total counts
         """
         if not customers:
-            return {"one_time": 0, "repeat": 0, "frequent": 0, "total": 0}
-        
-        one_time = sum(1 for c in customers if c.get("orders_count", 0) == 1)
-        repeat = sum(1 for c in customers if 1 < c.get("orders_count", 0) <= 5)
-        frequent = sum(1 for c in customers if c.get("orders_count", 0) > 5)
-        
-        analysis = {
-            "one_time": one_time,
-            "repeat": repeat,
-            "frequent": frequent,
-            "total": len(customers)
-        }
+            return FrequencyAnalysis(one_time=0, repeat=0, frequent=0, total=0)
+        
+        # Tally order counts in C (bincount-style), then bucket the few distinct values
+        histogram = Counter(customer.get("orders_count", 0) for customer in customers)
+        one_time = histogram[1]
+        repeat = frequent = 0
+        for orders_count, customer_count in histogram.items():
+            if orders_count > 5:
+                frequent += customer_count
+            elif orders_count > 1:
+                repeat += customer_count
+        
+        analysis = FrequencyAnalysis(
+            one_time=one_time,
+            repeat=repeat,
+            frequent=frequent,
+            total=len(customers)
+        )
         
         logger.debug(f"Order frequency analysis: {analysis}")
         return analysis
@@ -171,17 +363,8 @@ class InsightGenerator:
         Returns:
             Confidence level: "high", "medium", or "low"
         """
-        if not data:
-            return "low"
-        
-        data_points = len(data)
-        
-        if data_points < self.MIN_DATA_POINTS:
-            return "low"
-        elif data_points < 30:
-            return "medium"
-        else:
-            return "high"
+        # Confidence depends only on how many data points there are
+        return _confidence_from_count(len(data), self.MIN_DATA_POINTS)
     
     def _generate_insights_with_llm(
         self,
@@ -4,8 +4,10 @@ Uses OpenAI GPT-4o-mini to classify user questions and extract structured inform
 """
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import re
+from collections import OrderedDict
+from dataclasses import replace
 from datetime import datetime, timedelta, timezone
 
 from services.openai_service import OpenAIService
@@ -13,6 +15,59 @@ from models.intent import Intent, IntentType, TimePeriod
 
 logger = logging.getLogger(__name__)
 
+# Intent type lookup by string value, built once
+_INTENT_BY_VALUE: Dict[str, IntentType] = {intent_type.value: intent_type for intent_type in IntentType}
+
+# Unambiguous phrasings that can be classified without an LLM call.
+# Checked in order; the first match wins.
+_FAST_PATH_PATTERNS = [
+    (re.compile(r"\b(out of stock|stock[- ]?outs?|run(ning)? out)\b", re.IGNORECASE),
+     IntentType.STOCKOUT_PREDICTION),
+    (re.compile(r"\b(reorder|restock|stock up)\b", re.IGNORECASE),
+     IntentType.INVENTORY_PROJECTION),
+    (re.compile(r"\b(top\s+\d+\s+(selling\s+)?products?|best[- ]selling)\b", re.IGNORECASE),
+     IntentType.SALES_TRENDS),
+    (re.compile(r"\b(repeat|returning|loyal)\s+(customers?|orders?)\b", re.IGNORECASE),
+     IntentType.CUSTOMER_BEHAVIOR),
+]
+
+# Relative time periods recognised by the fast path, mapped to days
+_NAMED_PERIODS = {"week": 7, "month": 30, "quarter": 90, "year": 365}
+_NAMED_PERIOD_PATTERN = re.compile(r"\b(last|past|next)\s+(week|month|quarter|year)\b", re.IGNORECASE)
+_DAYS_PERIOD_PATTERN = re.compile(r"\b(last|past|next|in)\s+(\d+)\s+days?\b", re.IGNORECASE)
+_COUNT_METRIC_PATTERN = re.compile(r"\b(top\s+\d+|how many)\b", re.IGNORECASE)
+
+# Few-shot examples appended to the classification prompt
+_CLASSIFICATION_EXAMPLES = """Examples:
+- "What were my top 5 selling products last week?" → intent_type: "sales_trends", time_period: {"description": "last week", "days": -7}, metrics: ["count", "sum"]
+- "How many units of Product X will I need next month?" → intent_type: "inventory_projection", time_period: {"description": "next month", "days": 30}, entities: ["Product X"]
+- "Which customers placed repeat orders?" → intent_type: "customer_behavior", entities: ["repeat customers"], metrics: ["count"]"""
+
+
+def _normalize_question(question: str) -> str:
+    """Cache key for a question: case-folded with whitespace collapsed"""
+    return " ".join(question.casefold().split())
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Normalize an entities/metrics value from the LLM into a list"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def _copy_intent(intent: Intent, question: str) -> Intent:
+    """Copy an intent so cached entries are never shared or mutated by callers"""
+    return replace(
+        intent,
+        time_period=replace(intent.time_period) if intent.time_period else None,
+        entities=list(intent.entities),
+        metrics=list(intent.metrics),
+        raw_question=question
+    )
+
 
 class IntentClassifier:
     """
@@ -20,33 +75,88 @@ class IntentClassifier:
     Uses dependency injection for OpenAI service
     """
     
-    def __init__(self, openai_service: OpenAIService):
+    FAST_PATH_CONFIDENCE = 0.9
+    CACHE_SIZE = 1024
+    
+    def __init__(self, openai_service: OpenAIService, use_fast_path: bool = False):
         """
         Initialize intent classifier
         
         Args:
             openai_service: OpenAI service instance for LLM calls
+            use_fast_path: Classify unambiguous questions with keyword patterns
+                instead of calling the LLM (entities are not extracted)
         """
         self.openai_service = openai_service
+        self.use_fast_path = use_fast_path
+        # The system message never changes, so render it once per classifier
+        self._system_message = self._get_system_message()
+        # LRU cache of classified intents keyed by normalized question text
+        self._cache: "OrderedDict[str, Intent]" = OrderedDict()
         logger.info("Intent classifier initialized")
     
     def classify(self, question: str) -> Intent:
         """
         Classify a natural language question into a structured intent
         
+        Repeated questions (ignoring case and whitespace) are served from
+        an in-memory LRU cache instead of calling the LLM again.
+        
+        Args:
+            question: User's natural language question
+        
+        Returns:
+            Intent object with classified information
+        """
+        cache_key = _normalize_question(question)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            logger.debug("Intent cache hit")
+            return _copy_intent(cached, question)
+        
+        intent = self._classify_uncached(question)
+        self._remember(cache_key, intent)
+        
+        return intent
+    
+    def _remember(self, cache_key: str, intent: Intent) -> None:
+        """
+        Store a classified intent in the LRU cache
+        
+        Args:
+            cache_key: Normalized question text
+            intent: Classified intent
+        """
+        # Failed classifications carry zero confidence and are not cached
+        if intent.confidence > 0:
+            self._cache[cache_key] = _copy_intent(intent, intent.raw_question)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    def _classify_uncached(self, question: str) -> Intent:
+        """
+        Classify a question via the fast path or the LLM, bypassing the cache
+        
         Args:
             question: User's natural language question
         
         Returns:
             Intent object with classified information
         """
+        if self.use_fast_path:
+            intent = self._classify_with_patterns(question)
+            if intent is not None:
+                logger.info(f"Classified question as {intent.type} via keyword fast path")
+                return intent
+        
         try:
             # Build prompt for intent classification
             prompt = self._build_classification_prompt(question)
             
             # Get classification from OpenAI
             messages = self.openai_service.create_prompt(
-                system_message=self._get_system_message(),
+                system_message=self._system_message,
                 user_message=prompt
             )
             
@@ -75,6 +185,56 @@ class IntentClassifier:
                 raw_question=question
             )
     
+    def _classify_with_patterns(self, question: str) -> Optional[Intent]:
+        """
+        Classify a question locally using precompiled keyword patterns
+        
+        Args:
+            question: User's question
+        
+        Returns:
+            Intent if an unambiguous pattern matched, otherwise None
+        """
+        for pattern, intent_type in _FAST_PATH_PATTERNS:
+            if pattern.search(question):
+                break
+        else:
+            return None
+        
+        return Intent(
+            type=intent_type,
+            time_period=self._extract_time_period(question),
+            entities=[],
+            metrics=["count"] if _COUNT_METRIC_PATTERN.search(question) else [],
+            confidence=self.FAST_PATH_CONFIDENCE,
+            raw_question=question
+        )
+    
+    def _extract_time_period(self, question: str) -> Optional[TimePeriod]:
+        """
+        Extract a relative time period such as "last week" or "next 30 days"
+        
+        Args:
+            question: User's question
+        
+        Returns:
+            TimePeriod or None if no period was mentioned
+        """
+        match = _NAMED_PERIOD_PATTERN.search(question)
+        if match:
+            days = _NAMED_PERIODS[match.group(2).lower()]
+        else:
+            match = _DAYS_PERIOD_PATTERN.search(question)
+            if not match:
+                return None
+            days = int(match.group(2))
+        
+        direction = match.group(1).lower()
+        if direction in ("last", "past"):
+            days = -days
+        
+        return TimePeriod(description=match.group(0), days=days)
+    
     def _get_system_message(self) -> str:
         """Get the system message for intent classification"""
         return """You are an expert at analyzing business analytics questions for Shopify stores.
@@ -122,10 +282,7 @@ Respond with JSON in this exact format:
     "confidence": 0.0 to 1.0
 }}
 
-Examples:
-- "What were my top 5 selling products last week?" → intent_type: "sales_trends", time_period: {{"description": "last week", "days": -7}}, metrics: ["count", "sum"]
-- "How many units of Product X will I need next month?" → intent_type: "inventory_projection", time_period: {{"description": "next month", "days": 30}}, entities: ["Product X"]
-- "Which customers placed repeat orders?" → intent_type: "customer_behavior", entities: ["repeat customers"], metrics: ["count"]"""
+{_CLASSIFICATION_EXAMPLES}"""
     
     def _parse_classification_response(self, response: Dict[str, Any], original_question: str) -> Intent:
         """
@@ -141,9 +298,8 @@ Examples:
         try:
             # Extract intent type
             intent_type_str = response.get("intent_type", "unknown")
-            try:
-                intent_type = IntentType(intent_type_str)
-            except ValueError:
+            intent_type = _INTENT_BY_VALUE.get(intent_type_str)
+            if intent_type is None:
                 logger.warning(f"Unknown intent type: {intent_type_str}")
                 intent_type = IntentType.UNKNOWN
             
@@ -156,9 +312,9 @@ Examples:
                     days=time_period_data.get("days")
                 )
             
-            # Extract entities and metrics
-            entities = response.get("entities", [])
-            metrics = response.get("metrics", [])
+            # Extract entities and metrics (the LLM may send null or a bare string)
+            entities = _as_list(response.get("entities"))
+            metrics = _as_list(response.get("metrics"))
             confidence = float(response.get("confidence", 0.5))
             
             return Intent(
@@ -8,8 +8,16 @@ from typing import Dict, List, Optional, Any
 from openai import OpenAI, OpenAIError, RateLimitError, APITimeoutError
 import logging
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Prefer orjson's C parser for LLM JSON responses when it is installed
+_json_loads = orjson.loads if orjson else json.loads
+
 
 class OpenAIService:
     """
@@ -140,7 +148,7 @@ class OpenAIService:
         )
         
         try:
-            return json.loads(response)
+            return _json_loads(response)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response: {response}")
             raise ValueError(f"Invalid JSON response from OpenAI: {e}")
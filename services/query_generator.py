@@ -4,7 +4,8 @@ Generates ShopifyQL queries from structured intents using OpenAI GPT-4o-mini
 """
 import logging
 import re
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 
 from services.openai_service import OpenAIService
@@ -12,6 +13,25 @@ from models.intent import Intent, IntentType, TimePeriod
 
 logger = logging.getLogger(__name__)
 
+# Aggregation clause for each metric name, built once and read-only
+_METRIC_TO_AGGREGATION: Mapping[str, str] = MappingProxyType({
+    "count": "COUNT(*)",
+    "sum": "SUM(quantity)",
+    "average": "AVG(price)",
+    "total": "SUM(total_price)",
+    "max": "MAX(quantity)",
+    "min": "MIN(quantity)"
+})
+
+
+def _clean_query(query: str) -> str:
+    """Strip whitespace and code block markers from a generated query"""
+    query = query.strip()
+    if query.startswith("```"):
+        # Remove code block markers if present
+        query = query.replace("```sql", "").replace("```", "").strip()
+    return query
+
 
 class ShopifyQLGenerator:
     """
@@ -19,13 +39,14 @@ class ShopifyQLGenerator:
     Uses dependency injection for OpenAI service
     """
     
-    # Mapping of intent types to Shopify data sources
-    INTENT_TO_DATA_SOURCES = {
-        IntentType.INVENTORY_PROJECTION: ["orders", "products", "inventory_levels"],
-        IntentType.SALES_TRENDS: ["orders", "products"],
-        IntentType.CUSTOMER_BEHAVIOR: ["customers", "orders"],
-        IntentType.PRODUCT_PERFORMANCE: ["products", "orders"],
-        IntentType.STOCKOUT_PREDICTION: ["products", "inventory_levels", "orders"],
+    # Mapping of intent types to Shopify data sources. Tuples, so callers
+    # can't mutate the shared values.
+    INTENT_TO_DATA_SOURCES: Dict[IntentType, Tuple[str, ...]] = {
+        IntentType.INVENTORY_PROJECTION: ("orders", "products", "inventory_levels"),
+        IntentType.SALES_TRENDS: ("orders", "products"),
+        IntentType.CUSTOMER_BEHAVIOR: ("customers", "orders"),
+        IntentType.PRODUCT_PERFORMANCE: ("products", "orders"),
+        IntentType.STOCKOUT_PREDICTION: ("products", "inventory_levels", "orders"),
     }
     
     def __init__(self, openai_service: OpenAIService):
@@ -74,7 +95,7 @@ class ShopifyQLGenerator:
             logger.error(f"Failed to generate query: {e}")
             raise ValueError(f"Cannot generate query: {str(e)}")
     
-    def _map_intent_to_data_sources(self, intent: Intent) -> List[str]:
+    def _map_intent_to_data_sources(self, intent: Intent) -> Tuple[str, ...]:
         """
         Map intent type to required Shopify data sources
         
@@ -82,9 +103,9 @@ class ShopifyQLGenerator:
             intent: Intent object
         
         Returns:
-            List of data source names
+            Tuple of data source names
         """
-        data_sources = self.INTENT_TO_DATA_SOURCES.get(intent.type, ["orders"])
+        data_sources = self.INTENT_TO_DATA_SOURCES.get(intent.type, ("orders",))
         logger.debug(f"Mapped {intent.type} to data sources: {data_sources}")
         return data_sources
     
@@ -122,25 +143,13 @@ class ShopifyQLGenerator:
         Returns:
             Aggregation string for query
         """
-        if not metrics:
-            return ""
-        
-        aggregation_map = {
-            "count": "COUNT(*)",
-            "sum": "SUM(quantity)",
-            "average": "AVG(price)",
-            "total": "SUM(total_price)",
-            "max": "MAX(quantity)",
-            "min": "MIN(quantity)"
-        }
-        
-        aggs = [aggregation_map.get(m.lower(), "COUNT(*)") for m in metrics]
-        return ", ".join(aggs)
+        # Unrecognized metrics fall back to a row count
+        return ", ".join(_METRIC_TO_AGGREGATION.get(m.lower(), "COUNT(*)") for m in metrics)
     
     def _generate_query_with_llm(
         self,
         intent: Intent,
-        data_sources: List[str],
+        data_sources: Tuple[str, ...],
         time_filter: str,
         aggregations: str
     ) -> str:
@@ -149,7 +158,7 @@ class ShopifyQLGenerator:
         
         Args:
             intent: Intent object
-            data_sources: List of data sources
+            data_sources: Tuple of data sources
             time_filter: Time filter clause
             aggregations: Aggregation clause
         
@@ -169,13 +178,7 @@ class ShopifyQLGenerator:
             max_tokens=300
         )
         
-        # Clean up the query
-        query = query.strip()
-        if query.startswith("```"):
-            # Remove code block markers if present
-            query = query.replace("```sql", "").replace("```", "").strip()
-        
-        return query
+        return _clean_query(query)
     
     def _get_system_message(self) -> str:
         """Get system message for query generation"""
@@ -195,7 +198,7 @@ Return ONLY the query, no explanations."""
     def _build_query_generation_prompt(
         self,
         intent: Intent,
-        data_sources: List[str],
+        data_sources: Tuple[str, ...],
         time_filter: str,
         aggregations: str
     ) -> str:
@@ -204,7 +207,7 @@ Return ONLY the query, no explanations."""
         
         Args:
             intent: Intent object
-            data_sources: List of data sources
+            data_sources: Tuple of data sources
             time_filter: Time filter clause
             aggregations: Aggregation clause
         
@@ -10,6 +10,27 @@ from services.openai_service import OpenAIService
 
 logger = logging.getLogger(__name__)
 
+# Technical jargon to avoid, with a business-friendly replacement for each term
+_JARGON_REPLACEMENTS = {
+    "API": "system",
+    "query": "search",
+    "database": "records",
+    "SQL": "data",
+    "JSON": "data",
+    "HTTP": "connection",
+    "endpoint": "service",
+    "parameter": "setting",
+    "aggregation": "summary",
+    "schema": "structure"
+}
+_JARGON_BY_TERM = {term.lower(): replacement for term, replacement in _JARGON_REPLACEMENTS.items()}
+
+# One case-insensitive alternation matching any whole technical term
+_JARGON_PATTERN = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, _JARGON_REPLACEMENTS)) + r")\b",
+    re.IGNORECASE
+)
+
 
 class ResponseFormatter:
     """
@@ -17,12 +38,6 @@ class ResponseFormatter:
     Uses dependency injection for OpenAI service
     """
     
-    # Technical jargon to avoid
-    TECHNICAL_TERMS = [
-        "API", "query", "database", "SQL", "JSON", "HTTP",
-        "endpoint", "parameter", "aggregation", "schema"
-    ]
-    
     def __init__(self, openai_service: OpenAIService):
         """
         Initialize response formatter
@@ -142,11 +157,10 @@ Rewritten response:"""
         Returns:
             True if jargon found
         """
-        text_lower = text.lower()
-        for term in self.TECHNICAL_TERMS:
-            if term.lower() in text_lower:
-                logger.debug(f"Found technical term: {term}")
-                return True
+        match = _JARGON_PATTERN.search(text)
+        if match:
+            logger.debug(f"Found technical term: {match.group(0)}")
+            return True
         return False
     
     def _remove_jargon(self, text: str) -> str:
@@ -159,24 +173,8 @@ Rewritten response:"""
         Returns:
             Cleaned text
         """
-        replacements = {
-            "API": "system",
-            "query": "search",
-            "database": "records",
-            "SQL": "data",
-            "JSON": "data",
-            "HTTP": "connection",
-            "endpoint": "service",
-            "parameter": "setting",
-            "aggregation": "summary",
-            "schema": "structure"
-        }
-        
-        result = text
-        for term, replacement in replacements.items():
-            result = re.sub(rf'\b{term}\b', replacement, result, flags=re.IGNORECASE)
-        
-        return result
+        # Replace every term in a single pass over the text
+        return _JARGON_PATTERN.sub(lambda match: _JARGON_BY_TERM[match.group(0).lower()], text)
     
     def _add_numerical_context(self, text: str, data_summary: Dict[str, Any]) -> str:
         """
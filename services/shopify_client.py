@@ -3,14 +3,23 @@ Shopify API Client
 Handles all interactions with Shopify API including data retrieval and query execution
 """
 import os
+import json
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import httpx
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Prefer orjson's C parser for Shopify response bodies when it is installed
+_json_loads = orjson.loads if orjson else json.loads
+
 
 class ShopifyClient:
     """
@@ -36,9 +45,20 @@ class ShopifyClient:
         self.api_version = os.getenv("SHOPIFY_API_VERSION", self.API_VERSION)
         self.base_url = f"https://{shop_domain}/admin/api/{self.api_version}"
         self.http_client = http_client or httpx.AsyncClient()
+        self._backoff_key: Optional[Tuple[float, int]] = None
+        self._backoff: Tuple[float, ...] = ()
         
         logger.info(f"Initialized Shopify client for {shop_domain}")
     
+    @property
+    def _backoff_schedule(self) -> Tuple[float, ...]:
+        """Exponential backoff delay before each retry, rebuilt when the retry settings change"""
+        key = (self.INITIAL_RETRY_DELAY, self.MAX_RETRIES)
+        if key != self._backoff_key:
+            self._backoff = tuple(self.INITIAL_RETRY_DELAY * (2 ** i) for i in range(self.MAX_RETRIES))
+            self._backoff_key = key
+        return self._backoff
+    
     async def _make_authenticated_request(
         self,
         method: str,
@@ -68,7 +88,6 @@ class ShopifyClient:
         }
         
         retry_count = 0
-        retry_delay = self.INITIAL_RETRY_DELAY
         
         while retry_count <= self.MAX_RETRIES:
             try:
@@ -84,10 +103,10 @@ class ShopifyClient:
                 # Handle rate limiting (429)
                 if response.status_code == 429:
                     if retry_count < self.MAX_RETRIES:
+                        retry_delay = self._backoff_schedule[retry_count]
                         logger.warning(f"Rate limit hit, retrying in {retry_delay}s (attempt {retry_count + 1}/{self.MAX_RETRIES})")
                         await asyncio.sleep(retry_delay)
                         retry_count += 1
-                        retry_delay *= 2  # Exponential backoff
                         continue
                     else:
                         raise httpx.HTTPError(f"Rate limit exceeded after {self.MAX_RETRIES} retries")
@@ -95,14 +114,14 @@ class ShopifyClient:
                 # Raise for other error status codes
                 response.raise_for_status()
                 
-                return response.json()
+                return _json_loads(response.content)
             
             except httpx.TimeoutException as e:
                 if retry_count < self.MAX_RETRIES:
+                    retry_delay = self._backoff_schedule[retry_count]
                     logger.warning(f"Request timeout, retrying in {retry_delay}s (attempt {retry_count + 1}/{self.MAX_RETRIES})")
                     await asyncio.sleep(retry_delay)
                     retry_count += 1
-                    retry_delay *= 2
                     continue
                 else:
                     logger.error(f"Request timeout after {self.MAX_RETRIES} retries")
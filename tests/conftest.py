@@ -1,28 +1,63 @@
 """
 Pytest configuration and fixtures
 """
+import logging
+import os
+
 import pytest
-import pytest_asyncio
 from hypothesis import settings, HealthCheck
 
 # Configure pytest-asyncio
 pytest_plugins = ('pytest_asyncio',)
 
 # Configure Hypothesis globally to suppress health checks
-settings.register_profile(
-    "default",
-    suppress_health_check=[
-        HealthCheck.function_scoped_fixture,
-        HealthCheck.filter_too_much,
-    ],
-    deadline=10000,  # 10 seconds for slow tests with retries
-)
-settings.load_profile("default")
-
-@pytest_asyncio.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    import asyncio
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+_SUPPRESSED_HEALTH_CHECKS = [
+    HealthCheck.function_scoped_fixture,
+    HealthCheck.filter_too_much,
+    HealthCheck.too_slow,
+]
+
+# Example budgets per environment; tests without their own @settings inherit these
+settings.register_profile("dev", max_examples=10, deadline=None, suppress_health_check=_SUPPRESSED_HEALTH_CHECKS)
+settings.register_profile("ci", max_examples=25, deadline=None, suppress_health_check=_SUPPRESSED_HEALTH_CHECKS)
+settings.register_profile("nightly", max_examples=500, deadline=None, suppress_health_check=_SUPPRESSED_HEALTH_CHECKS)
+settings.load_profile(os.getenv("HYPOTHESIS_PROFILE", "dev"))
+
+
+def pytest_addoption(parser):
+    """Register command line options for the test suite"""
+    parser.addoption(
+        "--record-mode",
+        choices=("once", "rewrite", "none"),
+        default="once",
+        help="Recorded OpenAI responses for the scenario suite: replay and record misses (once), "
+             "re-record everything (rewrite), or replay only (none)",
+    )
+
+
+def pytest_collection_modifyitems(items):
+    """Tag every Hypothesis @given test with the property marker"""
+    for item in items:
+        if getattr(getattr(item, "obj", None), "is_hypothesis_test", False):
+            item.add_marker(pytest.mark.property)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _load_env():
+    """Load environment variables from .env once per test session"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_service_imports():
+    """Import the service layer once per session instead of at collection time"""
+    # Only DB-free modules here; routers create the database engine on import
+    import services.agent  # noqa: F401
+    import services.shopify_client  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def _log_level(caplog):
+    """Capture log records at DEBUG and above for every test"""
+    caplog.set_level(logging.DEBUG)
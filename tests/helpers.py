@@ -0,0 +1,59 @@
+"""
+Shared test doubles for the service tests
+"""
+import json
+from types import SimpleNamespace
+
+
+class FakeOpenAIService:
+    """
+    Plain stand-in for OpenAIService with canned replies and call counters
+    
+    Set completion or json_response to an Exception to make the matching call raise it.
+    """
+    
+    def __init__(self, completion="", json_response=None):
+        self.completion = completion
+        self.json_response = json_response
+        self.prompt_calls = 0
+        self.completion_calls = 0
+        self.json_calls = 0
+    
+    def create_prompt(self, system_message, user_message):
+        self.prompt_calls += 1
+        return [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+    
+    def chat_completion(self, messages, temperature=0.7, max_tokens=1000, response_format=None):
+        self.completion_calls += 1
+        if isinstance(self.completion, Exception):
+            raise self.completion
+        return self.completion
+    
+    def chat_completion_json(self, messages, temperature=0.7, max_tokens=1000):
+        self.json_calls += 1
+        if isinstance(self.json_response, Exception):
+            raise self.json_response
+        return self.json_response
+
+
+def fake_response(payload, status=200):
+    """
+    Build a lightweight stand-in for an httpx response
+    
+    Args:
+        payload: Value returned by .json()
+        status: HTTP status code
+    
+    Returns:
+        Object exposing status_code, content, json() and raise_for_status()
+    """
+    content = json.dumps(payload).encode()
+    return SimpleNamespace(
+        status_code=status,
+        content=content,
+        json=lambda: json.loads(content),
+        raise_for_status=lambda: None,
+    )
@@ -11,20 +11,33 @@ from fastapi import HTTPException
 from routers.analytics import process_question, create_agent
 from models.schemas import QuestionRequest
 from models.store import Store
+from tests.helpers import fake_response
+
+
+def set_store(mock_db, store):
+    """Make the mocked store lookup return the given store (or None)"""
+    mock_db.first.return_value = store
 
 
 class TestErrorHandling:
     """Test suite for error handling and logging"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def mock_db(self):
-        """Create a mock database session"""
+        """Create a mock database session shared across the module"""
         mock = Mock()
-        mock.query = Mock(return_value=mock)
-        mock.filter = Mock(return_value=mock)
+        mock.query.return_value = mock
+        mock.filter.return_value = mock
         mock.first = Mock(return_value=None)
         return mock
     
+    @pytest.fixture(autouse=True)
+    def _reset_mock_db(self, mock_db):
+        """Reset the shared store lookup after each test"""
+        yield
+        mock_db.first.reset_mock()
+        mock_db.first.return_value = None
+    
     @pytest.fixture
     def mock_store(self):
         """Create a mock store"""
@@ -58,7 +71,7 @@ class TestErrorHandling:
         
         # Simulate different error conditions
         if error_type == "store_not_found":
-            mock_db.first = Mock(return_value=None)
+            set_store(mock_db, None)
             
             with pytest.raises(HTTPException) as exc_info:
                 await process_question(request, mock_db)
@@ -77,7 +90,7 @@ class TestErrorHandling:
             mock_store = Mock(spec=Store)
             mock_store.shop_domain = "test.myshopify.com"
             mock_store.access_token = "token"
-            mock_db.first = Mock(return_value=mock_store)
+            set_store(mock_db, mock_store)
             
             with patch('routers.analytics.create_agent') as mock_create:
                 mock_agent = Mock()
@@ -108,33 +121,33 @@ class TestErrorHandling:
             question=question
         )
         
-        mock_db.first = Mock(return_value=mock_store)
+        set_store(mock_db, mock_store)
         
         with patch('routers.analytics.create_agent') as mock_create:
             mock_agent = Mock()
             mock_agent.process_question = AsyncMock(side_effect=Exception("Test error"))
             mock_create.return_value = mock_agent
             
-            with caplog.at_level(logging.ERROR):
-                with pytest.raises(HTTPException):
-                    await process_question(request, mock_db)
+            with pytest.raises(HTTPException):
+                await process_question(request, mock_db)
             
             # Verify error was logged
-            assert len(caplog.records) > 0, "Should log error"
+            error_logs = [r for r in caplog.records if r.levelno >= logging.ERROR]
+            assert len(error_logs) > 0, "Should log error"
             
             # Verify log contains error information
-            log_text = " ".join([record.message for record in caplog.records])
+            log_text = " ".join([record.message for record in error_logs])
             assert "error" in log_text.lower(), "Log should mention error"
     
     @pytest.mark.asyncio
     async def test_store_not_found_error(self, mock_db):
-        """Test error when store is not found"""
+        """Test error when store is not found and the HTTPException is not re-wrapped"""
         request = QuestionRequest(
             store_id="nonexistent-store.myshopify.com",
             question="What are my sales?"
         )
         
-        mock_db.first = Mock(return_value=None)
+        set_store(mock_db, None)
         
         with pytest.raises(HTTPException) as exc_info:
             await process_question(request, mock_db)
@@ -152,7 +165,7 @@ class TestErrorHandling:
             question="What are my sales?"
         )
         
-        mock_db.first = Mock(return_value=mock_store)
+        set_store(mock_db, mock_store)
         
         with patch('routers.analytics.create_agent') as mock_create:
             mock_agent = Mock()
@@ -174,38 +187,20 @@ class TestErrorHandling:
             question="What are my sales?"
         )
         
-        mock_db.first = Mock(return_value=mock_store)
+        set_store(mock_db, mock_store)
         
         with patch('routers.analytics.create_agent') as mock_create:
             mock_agent = Mock()
             mock_agent.process_question = AsyncMock(side_effect=Exception("Test error"))
             mock_create.return_value = mock_agent
             
-            with caplog.at_level(logging.ERROR):
-                with pytest.raises(HTTPException):
-                    await process_question(request, mock_db)
+            with pytest.raises(HTTPException):
+                await process_question(request, mock_db)
             
             # Verify log contains context
-            log_messages = [record.message for record in caplog.records]
+            log_messages = [r.message for r in caplog.records if r.levelno >= logging.ERROR]
             assert any("error" in msg.lower() for msg in log_messages)
     
-    @pytest.mark.asyncio
-    async def test_http_exception_not_caught(self, mock_db):
-        """Test that HTTPException is not caught and re-wrapped"""
-        request = QuestionRequest(
-            store_id="test-store.myshopify.com",
-            question="What are my sales?"
-        )
-        
-        mock_db.first = Mock(return_value=None)
-        
-        # Should raise HTTPException directly, not wrap it
-        with pytest.raises(HTTPException) as exc_info:
-            await process_question(request, mock_db)
-        
-        # Should be the original HTTPException
-        assert exc_info.value.status_code == 404
-    
     def test_create_agent_with_valid_store(self, mock_store):
         """Test agent creation with valid store"""
         agent = create_agent(mock_store)
@@ -247,7 +242,7 @@ class TestErrorHandling:
             question="What are my sales?"
         )
         
-        mock_db.first = Mock(return_value=mock_store)
+        set_store(mock_db, mock_store)
         
         with patch('routers.analytics.create_agent') as mock_create:
             mock_agent = Mock()
@@ -260,11 +255,10 @@ class TestErrorHandling:
             })
             mock_create.return_value = mock_agent
             
-            with caplog.at_level(logging.INFO):
-                await process_question(request, mock_db)
+            await process_question(request, mock_db)
             
             # Verify info logs exist
-            info_logs = [r for r in caplog.records if r.levelname == "INFO"]
+            info_logs = [r for r in caplog.records if r.levelno == logging.INFO]
             assert len(info_logs) > 0, "Should log successful requests"
             
             # Verify log contains request info
@@ -314,10 +308,7 @@ class TestQueryExecutionErrors:
         
         # Mock the HTTP client's request method
         with patch.object(client, 'http_client') as mock_http_client:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json = Mock(return_value={"orders": []})
-            mock_http_client.request = AsyncMock(return_value=mock_response)
+            mock_http_client.request = AsyncMock(return_value=fake_response({"orders": []}))
             
             result = await client.get_orders()
             
@@ -0,0 +1,79 @@
+"""
+Tests for the logging helpers
+"""
+import logging
+import time
+
+import pytest
+
+from utils.logger import _CachedTimeFormatter
+
+
+DATEFMT = "%Y-%m-%d %H:%M:%S"
+# Fixed base time so the results don't depend on when the suite runs
+BASE = 1_700_000_000.0
+
+
+def _record(created: float) -> logging.LogRecord:
+    """Log record stamped with the given creation time"""
+    return logging.makeLogRecord({"created": created})
+
+
+def _expected(created: float, datefmt=None) -> str:
+    """Timestamp rendered by the stock formatter"""
+    return logging.Formatter().formatTime(_record(created), datefmt)
+
+
+class TestCachedTimeFormatter:
+    """Test suite for _CachedTimeFormatter"""
+    
+    @pytest.fixture
+    def formatter(self):
+        """Create a fresh formatter with an empty timestamp cache"""
+        return _CachedTimeFormatter(datefmt=DATEFMT)
+    
+    @pytest.fixture
+    def strftime_calls(self, monkeypatch):
+        """Count calls to time.strftime"""
+        calls = []
+        real_strftime = time.strftime
+        
+        def counting_strftime(*args):
+            calls.append(args)
+            return real_strftime(*args)
+        
+        monkeypatch.setattr(time, "strftime", counting_strftime)
+        return calls
+    
+    def test_same_second_reuses_rendered_timestamp(self, formatter, strftime_calls):
+        """Test that records within one second render once and match the stock formatter"""
+        results = [formatter.formatTime(_record(BASE + offset), DATEFMT) for offset in (0.0, 0.25, 0.999)]
+        
+        assert len(strftime_calls) == 1
+        assert results == [_expected(BASE, DATEFMT)] * 3
+    
+    def test_next_second_renders_again(self, formatter, strftime_calls):
+        """Test that a record in the following second gets a fresh timestamp"""
+        first = formatter.formatTime(_record(BASE + 0.9), DATEFMT)
+        second = formatter.formatTime(_record(BASE + 1.1), DATEFMT)
+        
+        assert len(strftime_calls) == 2
+        assert first == _expected(BASE + 0.9, DATEFMT)
+        assert second == _expected(BASE + 1.1, DATEFMT)
+        assert first != second
+    
+    def test_changed_datefmt_is_not_served_from_cache(self, formatter):
+        """Test that a different datefmt in the same second is rendered with that format"""
+        formatter.formatTime(_record(BASE), DATEFMT)
+        
+        result = formatter.formatTime(_record(BASE), "%H:%M")
+        
+        assert result == _expected(BASE, "%H:%M")
+    
+    def test_no_datefmt_matches_stock_formatter(self, formatter):
+        """Test that datefmt=None bypasses the cache and keeps the default format"""
+        formatter.formatTime(_record(BASE), DATEFMT)
+        
+        result = formatter.formatTime(_record(BASE + 0.5), None)
+        
+        assert result == _expected(BASE + 0.5)
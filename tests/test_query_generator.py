@@ -2,13 +2,39 @@
 Tests for ShopifyQL Query Generator
 Includes property-based tests using Hypothesis
 """
+import re
+from dataclasses import replace
+
 import pytest
 from hypothesis import given, strategies as st, settings
-from unittest.mock import Mock
 
 from services.query_generator import ShopifyQLGenerator
 from services.openai_service import OpenAIService
 from models.intent import Intent, IntentType, TimePeriod
+from tests.helpers import FakeOpenAIService
+
+
+# Write operations that must never appear as standalone keywords in a generated query
+_DANGEROUS_RE = re.compile(r"\b(DROP|DELETE|UPDATE|INSERT|ALTER|CREATE)\b")
+
+# Expected validation error messages
+_FORBIDDEN_MSG = re.compile("forbidden keyword")
+_SELECT_MSG = re.compile("SELECT")
+_FROM_MSG = re.compile("FROM")
+_EMPTY_MSG = re.compile("empty")
+
+# Every intent type a query can be generated for, frozen once at import
+_KNOWN_INTENT_TYPES = tuple(t for t in IntentType if t != IntentType.UNKNOWN)
+
+# Intent with filler fields; tests swap in the type they exercise
+_PROTO_INTENT = Intent(
+    type=IntentType.UNKNOWN,
+    time_period=None,
+    entities=[],
+    metrics=[],
+    confidence=0.9,
+    raw_question="test question"
+)
 
 
 class TestShopifyQLGenerator:
@@ -16,8 +42,8 @@ class TestShopifyQLGenerator:
     
     @pytest.fixture
     def mock_openai_service(self):
-        """Create a mock OpenAI service"""
-        return Mock(spec=OpenAIService)
+        """Create a fake OpenAI service"""
+        return FakeOpenAIService()
     
     @pytest.fixture
     def query_generator(self, mock_openai_service):
@@ -37,32 +63,27 @@ class TestShopifyQLGenerator:
         """
         Property test: Each intent type maps to correct data sources
         """
-        intent = Intent(
-            type=intent_type,
-            time_period=None,
-            entities=[],
-            metrics=[],
-            confidence=0.9,
-            raw_question="test question"
-        )
+        intent = replace(_PROTO_INTENT, type=intent_type)
         
         data_sources = query_generator._map_intent_to_data_sources(intent)
         
-        assert data_sources == expected_sources, f"{intent_type} should map to {expected_sources}"
+        assert data_sources == tuple(expected_sources), f"{intent_type} should map to {expected_sources}"
+    
+    def test_data_source_mapping_honors_overrides(self, query_generator):
+        """Test that an instance override of the mapping is used for lookups"""
+        query_generator.INTENT_TO_DATA_SOURCES = {IntentType.SALES_TRENDS: ("orders", "customers")}
+        
+        intent = replace(_PROTO_INTENT, type=IntentType.SALES_TRENDS)
+        
+        assert query_generator._map_intent_to_data_sources(intent) == ("orders", "customers")
     
     # Feature: shopify-ai-analytics, Property 13: ShopifyQL Syntax Validity
     # For any generated ShopifyQL query, it should be syntactically correct and parseable
-    @settings(max_examples=50, deadline=None)
-    @given(
-        intent_type=st.sampled_from(list(IntentType))
-    )
+    @pytest.mark.parametrize("intent_type", _KNOWN_INTENT_TYPES)
     def test_query_syntax_validity_property(self, query_generator, mock_openai_service, intent_type):
         """
         Property test: All generated queries have valid syntax
         """
-        if intent_type == IntentType.UNKNOWN:
-            return  # Skip unknown intents
-        
         intent = Intent(
             type=intent_type,
             time_period=TimePeriod(description="last week", days=-7),
@@ -72,28 +93,24 @@ class TestShopifyQLGenerator:
             raw_question="test question"
         )
         
-        # Mock OpenAI to return a valid query
-        mock_query = "SELECT product_title, SUM(quantity) FROM orders WHERE created_at >= '2024-01-01' GROUP BY product_title"
-        mock_openai_service.create_prompt = Mock(return_value=[])
-        mock_openai_service.chat_completion = Mock(return_value=mock_query)
+        # Fake OpenAI returns a valid query
+        mock_openai_service.completion = "SELECT product_title, SUM(quantity) FROM orders WHERE created_at >= '2024-01-01' GROUP BY product_title"
         
         query = query_generator.generate(intent)
         
         # Verify query has required components
-        assert "SELECT" in query.upper(), "Query must contain SELECT"
-        assert "FROM" in query.upper(), "Query must contain FROM"
+        query_upper = query.upper()
+        assert "SELECT" in query_upper, "Query must contain SELECT"
+        assert "FROM" in query_upper, "Query must contain FROM"
         
         # Verify no dangerous keywords (using word boundaries to avoid false positives like "CREATED_AT")
-        import re
-        dangerous = ["DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "CREATE"]
-        for keyword in dangerous:
-            pattern = r'\b' + keyword + r'\b'
-            assert not re.search(pattern, query.upper()), f"Query should not contain {keyword} as a standalone keyword"
+        match = _DANGEROUS_RE.search(query_upper)
+        assert match is None, f"Query should not contain {match.group(1)} as a standalone keyword"
     
     # Feature: shopify-ai-analytics, Property 14: Time Filter Inclusion
     # For any question that mentions a time period, the generated query should include
     # appropriate time filters matching that period
-    @settings(max_examples=50, deadline=None)
+    @settings(max_examples=25, deadline=None, derandomize=True)
     @given(
         days=st.integers(min_value=-365, max_value=365).filter(lambda x: x != 0)
     )
@@ -128,6 +145,7 @@ class TestShopifyQLGenerator:
         (["max"], "MAX"),
         (["min"], "MIN"),
         (["count", "sum"], "COUNT"),  # Should include at least one
+        (["median"], "COUNT"),  # Unknown metrics fall back to a count
     ])
     def test_aggregation_inclusion_property(self, query_generator, metrics, expected_in_result):
         """
@@ -149,8 +167,7 @@ class TestShopifyQLGenerator:
         )
         
         mock_query = "SELECT product_title, SUM(quantity) FROM orders WHERE product_title = 'Product X' GROUP BY product_title"
-        mock_openai_service.create_prompt = Mock(return_value=[])
-        mock_openai_service.chat_completion = Mock(return_value=mock_query)
+        mock_openai_service.completion = mock_query
         
         query = query_generator.generate(intent)
         
@@ -169,38 +186,37 @@ class TestShopifyQLGenerator:
         )
         
         mock_query = "SELECT product_title, COUNT(*), SUM(quantity) FROM orders WHERE created_at >= '2024-01-01' GROUP BY product_title ORDER BY SUM(quantity) DESC LIMIT 10"
-        mock_openai_service.create_prompt = Mock(return_value=[])
-        mock_openai_service.chat_completion = Mock(return_value=mock_query)
+        mock_openai_service.completion = mock_query
         
         query = query_generator.generate(intent)
         
         assert "SELECT" in query
         assert "FROM" in query
     
-    def test_query_validation_rejects_dangerous_keywords(self, query_generator):
-        """Test that dangerous SQL keywords are rejected"""
-        dangerous_queries = [
-            "SELECT * FROM orders; DROP TABLE orders",
-            "SELECT * FROM products; DELETE FROM products",
-            "SELECT * FROM customers; UPDATE customers SET email = 'hack'",
-            "SELECT * FROM orders; INSERT INTO orders VALUES (1, 2, 3)",
-        ]
-        
-        for query in dangerous_queries:
-            with pytest.raises(ValueError, match="forbidden keyword"):
-                query_generator._validate_query_syntax(query)
-    
-    def test_query_validation_requires_select(self, query_generator):
-        """Test that queries must contain SELECT"""
-        with pytest.raises(ValueError, match="SELECT"):
-            query_generator._validate_query_syntax("FROM orders")
+    def test_fake_openai_matches_service_interface(self):
+        """Test that the fake only stands in for methods OpenAIService really has"""
+        fake_methods = {name for name in vars(FakeOpenAIService) if not name.startswith("_")}
+        
+        for name in fake_methods:
+            assert callable(getattr(OpenAIService, name, None)), f"OpenAIService has no method {name}"
     
-    def test_query_validation_requires_from(self, query_generator):
-        """Test that queries must contain FROM"""
-        with pytest.raises(ValueError, match="FROM"):
-            query_generator._validate_query_syntax("SELECT * WHERE id = 1")
+    @pytest.mark.parametrize("bad_query", [
+        "SELECT * FROM orders; DROP TABLE orders",
+        "SELECT * FROM products; DELETE FROM products",
+        "SELECT * FROM customers; UPDATE customers SET email = 'hack'",
+        "SELECT * FROM orders; INSERT INTO orders VALUES (1, 2, 3)",
+    ])
+    def test_query_validation_rejects_dangerous_keywords(self, query_generator, bad_query):
+        """Test that dangerous SQL keywords are rejected"""
+        with pytest.raises(ValueError, match=_FORBIDDEN_MSG):
+            query_generator._validate_query_syntax(bad_query)
     
-    def test_empty_query_rejected(self, query_generator):
-        """Test that empty queries are rejected"""
-        with pytest.raises(ValueError, match="empty"):
-            query_generator._validate_query_syntax("")
+    @pytest.mark.parametrize("bad_query,message", [
+        pytest.param("FROM orders", _SELECT_MSG, id="requires_select"),
+        pytest.param("SELECT * WHERE id = 1", _FROM_MSG, id="requires_from"),
+        pytest.param("", _EMPTY_MSG, id="empty"),
+    ])
+    def test_query_validation_rejects_malformed_query(self, query_generator, bad_query, message):
+        """Test that queries must be non-empty and contain SELECT and FROM"""
+        with pytest.raises(ValueError, match=message):
+            query_generator._validate_query_syntax(bad_query)
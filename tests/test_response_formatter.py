@@ -2,39 +2,57 @@
 Tests for Response Formatter
 Includes property-based tests using Hypothesis
 """
+import re
+
 import pytest
-from hypothesis import given, strategies as st, settings
+from hypothesis import given, strategies as st
 from unittest.mock import Mock
 
 from services.response_formatter import ResponseFormatter
 from services.openai_service import OpenAIService
 
+_CANNED_COMPLETION = "Your store sold 100 units last week. This is great performance!"
+
+_JARGON_ST = st.sampled_from((
+    "API", "query", "database", "SQL", "JSON",
+    "HTTP", "endpoint", "parameter", "aggregation", "schema"
+))
+_CONFIDENCE_ST = st.sampled_from(("low", "medium", "high"))
+
+# Customer segments in the order format_customer_analysis lists them
+_CUST_CHECK = re.compile(r"(one-time).*(repeat).*(frequent)", re.IGNORECASE | re.DOTALL)
+_NUMBER = re.compile(r"\d+")
+
 
 class TestResponseFormatter:
     """Test suite for ResponseFormatter"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def mock_openai_service(self):
-        """Create a mock OpenAI service"""
+        """Create a mock OpenAI service shared by the module"""
         mock = Mock(spec=OpenAIService)
         mock.create_prompt = Mock(return_value=[])
-        mock.chat_completion = Mock(return_value="Your store sold 100 units last week. This is great performance!")
+        mock.chat_completion = Mock(return_value=_CANNED_COMPLETION)
         return mock
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def response_formatter(self, mock_openai_service):
-        """Create a ResponseFormatter instance"""
+        """Create a ResponseFormatter instance shared by the module"""
         return ResponseFormatter(openai_service=mock_openai_service)
     
+    @pytest.fixture(autouse=True)
+    def _reset_mock_openai_service(self, mock_openai_service):
+        """Reset recorded calls and canned responses after each test"""
+        yield
+        mock_openai_service.reset_mock(side_effect=True)
+        mock_openai_service.create_prompt.return_value = []
+        mock_openai_service.chat_completion.return_value = _CANNED_COMPLETION
+    
     # Feature: shopify-ai-analytics, Property 27: Business Language Formatting
     # For any technical insights, the formatted response should not contain
     # technical jargon (API, SQL, JSON, etc.)
-    @settings(max_examples=50, deadline=None)
     @given(
-        jargon_term=st.sampled_from([
-            "API", "query", "database", "SQL", "JSON",
-            "HTTP", "endpoint", "parameter", "aggregation", "schema"
-        ])
+        jargon_term=_JARGON_ST
     )
     def test_business_language_formatting_property(self, response_formatter, jargon_term):
         """
@@ -52,9 +70,8 @@ class TestResponseFormatter:
     # Feature: shopify-ai-analytics, Property 28: Numerical Context Inclusion
     # For any response containing numbers, the formatter should add context
     # explaining what those numbers represent
-    @settings(max_examples=30, deadline=None)
     @given(
-        data_points=st.integers(min_value=1, max_value=1000)
+        data_points=st.integers(min_value=1, max_value=100)
     )
     def test_numerical_context_inclusion_property(self, response_formatter, data_points):
         """
@@ -72,9 +89,8 @@ class TestResponseFormatter:
     # Feature: shopify-ai-analytics, Property 30: Response Structure Clarity
     # For any formatted response, it should have clear structure with
     # answer, context, and recommendations when appropriate
-    @settings(max_examples=30, deadline=None)
     @given(
-        confidence=st.sampled_from(["low", "medium", "high"])
+        confidence=_CONFIDENCE_ST
     )
     def test_response_structure_clarity_property(self, response_formatter, confidence):
         """
@@ -164,15 +180,11 @@ class TestResponseFormatter:
         )
         
         # Verify all segments are included
-        assert "one-time" in analysis.lower()
-        assert "repeat" in analysis.lower()
-        assert "frequent" in analysis.lower()
+        assert _CUST_CHECK.search(analysis), "Should list one-time, repeat and frequent segments"
         
         # Verify counts are present
-        assert str(one_time) in analysis
-        assert str(repeat) in analysis
-        assert str(frequent) in analysis
-        assert str(total) in analysis
+        required_numbers = {str(n) for n in (one_time, repeat, frequent, total)}
+        assert required_numbers <= set(_NUMBER.findall(analysis)), "Should include every count"
         
         # Verify percentages are included
         assert "%" in analysis
@@ -4,11 +4,26 @@ Includes property-based tests using Hypothesis
 """
 import pytest
 import httpx
-from hypothesis import given, strategies as st, settings
-from unittest.mock import AsyncMock, Mock, patch
+from hypothesis import given, strategies as st
+from unittest.mock import AsyncMock
 import asyncio
 
 from services.shopify_client import ShopifyClient
+from tests.helpers import fake_response
+
+
+_ENDPOINT_ST = st.sampled_from(("/orders.json", "/products.json", "/customers.json", "/inventory_levels.json"))
+_METHOD_ST = st.sampled_from(("GET", "POST"))
+
+
+# Responses each get_* method consumes for an empty store, in request order
+_EMPTY_RESPONSES = {
+    "get_orders": (fake_response({"orders": []}),),
+    "get_products": (fake_response({"products": []}),),
+    "get_customers": (fake_response({"customers": []}),),
+    # Inventory needs locations first
+    "get_inventory": (fake_response({"locations": [{"id": 1}]}), fake_response({"inventory_levels": []})),
+}
 
 
 class TestShopifyClient:
@@ -20,6 +35,13 @@ class TestShopifyClient:
         client = AsyncMock(spec=httpx.AsyncClient)
         return client
     
+    @pytest.fixture
+    def virtual_sleep(self, monkeypatch):
+        """Replace the client's backoff sleep with a mock that records delays without waiting"""
+        sleep = AsyncMock()
+        monkeypatch.setattr("services.shopify_client.asyncio.sleep", sleep)
+        return sleep
+    
     @pytest.fixture
     def shopify_client(self, mock_http_client):
         """Create a ShopifyClient instance with mocked HTTP client"""
@@ -32,290 +54,172 @@ class TestShopifyClient:
     # Feature: shopify-ai-analytics, Property 2: Authentication Credentials Inclusion
     # For any API call to Shopify, the request should include valid authentication credentials in the headers
     @pytest.mark.asyncio
-    @settings(max_examples=100, deadline=None)
     @given(
-        endpoint=st.sampled_from(["/orders.json", "/products.json", "/customers.json", "/inventory_levels.json"]),
-        method=st.sampled_from(["GET", "POST"])
+        endpoint=_ENDPOINT_ST,
+        method=_METHOD_ST
     )
-    async def test_authentication_credentials_included_property(self, endpoint, method):
+    async def test_authentication_credentials_included_property(self, shopify_client, mock_http_client, endpoint, method):
         """
         Property test: All API requests include authentication credentials
-        Tests 100 different combinations of endpoints and methods
+        Tests combinations of endpoints and methods
         """
-        # Create mock client
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"data": []}
-        mock_response.raise_for_status = Mock()
-        mock_client.request = AsyncMock(return_value=mock_response)
-        
-        # Create Shopify client
-        client = ShopifyClient(
-            shop_domain="test-store.myshopify.com",
-            access_token="test_token_abc123",
-            http_client=mock_client
-        )
+        # Fresh response for this example on the shared mock client
+        mock_http_client.reset_mock()
+        mock_response = fake_response({"data": []})
+        mock_http_client.request = AsyncMock(return_value=mock_response)
         
         # Make request
-        await client._make_authenticated_request(method, endpoint)
+        await shopify_client._make_authenticated_request(method, endpoint)
         
         # Verify authentication header was included
-        call_args = mock_client.request.call_args
+        call_args = mock_http_client.request.call_args
         headers = call_args.kwargs.get("headers", {})
         
         assert "X-Shopify-Access-Token" in headers, "Authentication header missing"
-        assert headers["X-Shopify-Access-Token"] == "test_token_abc123", "Incorrect token"
+        assert headers["X-Shopify-Access-Token"] == "test_token_123", "Incorrect token"
         assert headers["Content-Type"] == "application/json", "Content-Type header missing"
     
-    @pytest.mark.asyncio
-    async def test_get_orders_includes_auth(self, shopify_client, mock_http_client):
-        """Test that get_orders includes authentication"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"orders": []}
-        mock_response.raise_for_status = Mock()
-        mock_http_client.request = AsyncMock(return_value=mock_response)
-        
-        await shopify_client.get_orders()
-        
-        # Verify auth header was included
-        call_args = mock_http_client.request.call_args
-        headers = call_args.kwargs["headers"]
-        assert "X-Shopify-Access-Token" in headers
-        assert headers["X-Shopify-Access-Token"] == "test_token_123"
+    def test_mock_http_client_rejects_unknown_attributes(self, mock_http_client):
+        """Test that the spec'd HTTP client mock only exposes real httpx.AsyncClient attributes"""
+        assert hasattr(mock_http_client, "request")
+        with pytest.raises(AttributeError):
+            mock_http_client.nonexistent
     
     @pytest.mark.asyncio
-    async def test_get_products_includes_auth(self, shopify_client, mock_http_client):
-        """Test that get_products includes authentication"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"products": []}
-        mock_response.raise_for_status = Mock()
-        mock_http_client.request = AsyncMock(return_value=mock_response)
+    @pytest.mark.parametrize("method_name,key", [
+        ("get_orders", "orders"),
+        ("get_products", "products"),
+        ("get_customers", "customers"),
+    ])
+    async def test_get_method_auth_and_empty_results(self, shopify_client, mock_http_client, method_name, key):
+        """Test that each get method includes authentication and handles empty results"""
+        mock_http_client.request = AsyncMock(return_value=fake_response({key: []}))
         
-        await shopify_client.get_products()
+        result = await getattr(shopify_client, method_name)()
         
         # Verify auth header was included
-        call_args = mock_http_client.request.call_args
-        headers = call_args.kwargs["headers"]
-        assert "X-Shopify-Access-Token" in headers
-    
-    @pytest.mark.asyncio
-    async def test_get_customers_includes_auth(self, shopify_client, mock_http_client):
-        """Test that get_customers includes authentication"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"customers": []}
-        mock_response.raise_for_status = Mock()
-        mock_http_client.request = AsyncMock(return_value=mock_response)
-        
-        await shopify_client.get_customers()
+        headers = mock_http_client.request.call_args.kwargs["headers"]
+        assert headers["X-Shopify-Access-Token"] == "test_token_123"
         
-        # Verify auth header was included
-        call_args = mock_http_client.request.call_args
-        headers = call_args.kwargs["headers"]
-        assert "X-Shopify-Access-Token" in headers
+        # Verify empty results come back as an empty list
+        assert result == []
+        assert isinstance(result, list)
 
 
     # Feature: shopify-ai-analytics, Property 4: Rate Limit Retry Behavior
     # For any Shopify API rate limit error, the system should implement exponential backoff
     # and retry the request up to 3 times before failing
     @pytest.mark.asyncio
-    @settings(max_examples=50, deadline=None)  # No deadline - retries with sleep take time
     @given(
         retry_count=st.integers(min_value=1, max_value=3)
     )
-    async def test_rate_limit_retry_behavior_property(self, retry_count):
+    async def test_rate_limit_retry_behavior_property(self, shopify_client, mock_http_client, virtual_sleep, retry_count):
         """
         Property test: Rate limit errors trigger exponential backoff retries
         Tests with different retry scenarios
         """
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
+        virtual_sleep.reset_mock()
+        mock_http_client.reset_mock()
         
         # Create responses: rate limit errors followed by success
         responses = []
         for i in range(retry_count):
-            rate_limit_response = Mock()
-            rate_limit_response.status_code = 429
+            rate_limit_response = fake_response(None, status=429)
             responses.append(rate_limit_response)
         
         # Final successful response
-        success_response = Mock()
-        success_response.status_code = 200
-        success_response.json.return_value = {"data": "success"}
-        success_response.raise_for_status = Mock()
+        success_response = fake_response({"data": "success"})
         responses.append(success_response)
         
-        mock_client.request = AsyncMock(side_effect=responses)
-        
-        client = ShopifyClient(
-            shop_domain="test-store.myshopify.com",
-            access_token="test_token",
-            http_client=mock_client
-        )
+        mock_http_client.request = AsyncMock(side_effect=responses)
         
         # Should succeed after retries
-        result = await client._make_authenticated_request("GET", "/test.json")
+        result = await shopify_client._make_authenticated_request("GET", "/test.json")
         
-        # Verify it retried the correct number of times
-        assert mock_client.request.call_count == retry_count + 1
+        # Verify it retried the correct number of times, backing off before each retry
+        assert mock_http_client.request.call_count == retry_count + 1
+        assert virtual_sleep.await_count == retry_count
         assert result == {"data": "success"}
     
     @pytest.mark.asyncio
-    async def test_rate_limit_max_retries_exceeded(self):
+    async def test_rate_limit_max_retries_exceeded(self, shopify_client, mock_http_client, virtual_sleep):
         """Test that rate limit errors fail after max retries"""
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        
         # Always return 429
-        rate_limit_response = Mock()
-        rate_limit_response.status_code = 429
-        mock_client.request = AsyncMock(return_value=rate_limit_response)
-        
-        client = ShopifyClient(
-            shop_domain="test-store.myshopify.com",
-            access_token="test_token",
-            http_client=mock_client
-        )
+        rate_limit_response = fake_response(None, status=429)
+        mock_http_client.request = AsyncMock(return_value=rate_limit_response)
         
         # Should fail after MAX_RETRIES
         with pytest.raises(httpx.HTTPError, match="Rate limit exceeded"):
-            await client._make_authenticated_request("GET", "/test.json")
+            await shopify_client._make_authenticated_request("GET", "/test.json")
         
         # Should have tried MAX_RETRIES + 1 times (initial + 3 retries)
-        assert mock_client.request.call_count == 4
+        assert mock_http_client.request.call_count == 4
+        delays = [call.args[0] for call in virtual_sleep.await_args_list]
+        assert delays == [1.0, 2.0, 4.0]
+        assert delays == list(shopify_client._backoff_schedule)
+    
+    @pytest.mark.asyncio
+    async def test_retry_settings_changed_after_construction(self, shopify_client, mock_http_client, virtual_sleep):
+        """Test that retry settings changed on the instance take effect on the next request"""
+        mock_http_client.request = AsyncMock(return_value=fake_response(None, status=429))
+        shopify_client.MAX_RETRIES = 1
+        shopify_client.INITIAL_RETRY_DELAY = 0.5
+        
+        with pytest.raises(httpx.HTTPError, match="Rate limit exceeded"):
+            await shopify_client._make_authenticated_request("GET", "/test.json")
+        
+        assert mock_http_client.request.call_count == 2
+        assert [call.args[0] for call in virtual_sleep.await_args_list] == [0.5]
     
     @pytest.mark.asyncio
-    @settings(max_examples=30, deadline=None)  # No deadline - backoff with sleep takes time
     @given(
         initial_delay=st.floats(min_value=0.1, max_value=2.0)
     )
-    async def test_exponential_backoff_timing(self, initial_delay):
+    async def test_exponential_backoff_timing(self, shopify_client, mock_http_client, virtual_sleep, initial_delay):
         """
         Property test: Verify exponential backoff increases delay
         """
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
+        virtual_sleep.reset_mock()
+        mock_http_client.reset_mock()
         
         # Return rate limit twice, then success
         responses = [
-            Mock(status_code=429),
-            Mock(status_code=429),
-            Mock(status_code=200, json=lambda: {"data": "ok"}, raise_for_status=Mock())
+            fake_response(None, status=429),
+            fake_response(None, status=429),
+            fake_response({"data": "ok"})
         ]
-        mock_client.request = AsyncMock(side_effect=responses)
-        
-        client = ShopifyClient(
-            shop_domain="test-store.myshopify.com",
-            access_token="test_token",
-            http_client=mock_client
-        )
-        client.INITIAL_RETRY_DELAY = initial_delay
+        mock_http_client.request = AsyncMock(side_effect=responses)
+        shopify_client.INITIAL_RETRY_DELAY = initial_delay
         
         # Execute request
-        await client._make_authenticated_request("GET", "/test.json")
+        await shopify_client._make_authenticated_request("GET", "/test.json")
         
-        # Verify it retried
-        assert mock_client.request.call_count == 3
+        # Verify it retried, doubling the delay each time
+        assert mock_http_client.request.call_count == 3
+        delays = [call.args[0] for call in virtual_sleep.await_args_list]
+        assert delays == [initial_delay, initial_delay * 2]
+        assert delays == list(shopify_client._backoff_schedule[:2])
 
 
     # Feature: shopify-ai-analytics, Property 5: Empty Result Handling
     # For any query that returns empty results from Shopify, the system should handle it
     # gracefully without throwing errors and should communicate the lack of data
     @pytest.mark.asyncio
-    @settings(max_examples=100, deadline=None)
     @given(
-        method_name=st.sampled_from(["get_orders", "get_products", "get_customers", "get_inventory"])
+        method_name=st.sampled_from(sorted(_EMPTY_RESPONSES))
     )
-    async def test_empty_result_handling_property(self, method_name):
+    async def test_empty_result_handling_property(self, shopify_client, mock_http_client, method_name):
         """
         Property test: All data retrieval methods handle empty results gracefully
         Tests across all get methods
         """
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        
-        # Return empty results
-        empty_response = Mock()
-        empty_response.status_code = 200
-        empty_response.raise_for_status = Mock()
-        
-        # Different empty response formats for different endpoints
-        if method_name == "get_orders":
-            empty_response.json.return_value = {"orders": []}
-        elif method_name == "get_products":
-            empty_response.json.return_value = {"products": []}
-        elif method_name == "get_customers":
-            empty_response.json.return_value = {"customers": []}
-        elif method_name == "get_inventory":
-            # Inventory needs locations first
-            locations_response = Mock()
-            locations_response.status_code = 200
-            locations_response.json.return_value = {"locations": [{"id": 1}]}
-            locations_response.raise_for_status = Mock()
-            
-            inventory_response = Mock()
-            inventory_response.status_code = 200
-            inventory_response.json.return_value = {"inventory_levels": []}
-            inventory_response.raise_for_status = Mock()
-            
-            mock_client.request = AsyncMock(side_effect=[locations_response, inventory_response])
-        else:
-            mock_client.request = AsyncMock(return_value=empty_response)
-        
-        if method_name != "get_inventory":
-            mock_client.request = AsyncMock(return_value=empty_response)
-        
-        client = ShopifyClient(
-            shop_domain="test-store.myshopify.com",
-            access_token="test_token",
-            http_client=mock_client
-        )
+        mock_http_client.reset_mock()
+        mock_http_client.request = AsyncMock(side_effect=list(_EMPTY_RESPONSES[method_name]))
         
         # Call the method
-        method = getattr(client, method_name)
+        method = getattr(shopify_client, method_name)
         result = await method()
         
         # Should return empty list, not raise exception
         assert isinstance(result, list), f"{method_name} should return a list"
         assert len(result) == 0, f"{method_name} should return empty list for no results"
-    
-    @pytest.mark.asyncio
-    async def test_get_orders_empty_results(self, shopify_client, mock_http_client):
-        """Test get_orders handles empty results"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"orders": []}
-        mock_response.raise_for_status = Mock()
-        mock_http_client.request = AsyncMock(return_value=mock_response)
-        
-        result = await shopify_client.get_orders()
-        
-        assert result == []
-        assert isinstance(result, list)
-    
-    @pytest.mark.asyncio
-    async def test_get_products_empty_results(self, shopify_client, mock_http_client):
-        """Test get_products handles empty results"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"products": []}
-        mock_response.raise_for_status = Mock()
-        mock_http_client.request = AsyncMock(return_value=mock_response)
-        
-        result = await shopify_client.get_products()
-        
-        assert result == []
-        assert isinstance(result, list)
-    
-    @pytest.mark.asyncio
-    async def test_get_customers_empty_results(self, shopify_client, mock_http_client):
-        """Test get_customers handles empty results"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"customers": []}
-        mock_response.raise_for_status = Mock()
-        mock_http_client.request = AsyncMock(return_value=mock_response)
-        
-        result = await shopify_client.get_customers()
-        
-        assert result == []
-        assert isinstance(result, list)
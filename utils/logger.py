@@ -3,8 +3,57 @@ Structured logging configuration for the Python AI Service
 """
 import logging
 import sys
+import time
 from typing import Optional
 
+
+class _CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that renders each second's timestamp once
+    
+    Records logged within the same second reuse the previous asctime string
+    instead of calling time.strftime again.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, datefmt, rendered timestamp) kept as one tuple so threads swap it atomically
+        self._last = (-1, None, "")
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt is None:
+            return super().formatTime(record, datefmt)
+        
+        sec = int(record.created)
+        last_sec, last_fmt, last_str = self._last
+        if sec == last_sec and datefmt == last_fmt:
+            return last_str
+        
+        rendered = time.strftime(datefmt, self.converter(sec))
+        self._last = (sec, datefmt, rendered)
+        return rendered
+
+
+# Shared by every logger so repeated setup_logger calls reuse one formatter and handler
+_FORMATTER = _CachedTimeFormatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_SHARED_HANDLER = logging.StreamHandler(sys.stdout)
+_SHARED_HANDLER.setFormatter(_FORMATTER)
+
+_LEVEL_CACHE = {
+    "CRITICAL": logging.CRITICAL,
+    "FATAL": logging.FATAL,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "WARN": logging.WARN,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+    "NOTSET": logging.NOTSET,
+}
+
+
 def setup_logger(name: Optional[str] = None, level: str = "INFO") -> logging.Logger:
     """
     Setup structured logger with consistent formatting
@@ -17,23 +66,21 @@ def setup_logger(name: Optional[str] = None, level: str = "INFO") -> logging.Log
         Configured logger instance
     """
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, level.upper()))
-    
-    # Remove existing handlers
-    logger.handlers = []
-    
-    # Create console handler
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(getattr(logging, level.upper()))
+    level_name = level.upper()
+    # Anything outside the table (e.g. custom levels) resolves as before
+    if level_name in _LEVEL_CACHE:
+        logger.setLevel(_LEVEL_CACHE[level_name])
+    else:
+        logger.setLevel(getattr(logging, level_name))
     
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
+    # Attach the console handler once; handlers added elsewhere are left alone
+    if not any(
+        isinstance(h, logging.StreamHandler) and h.stream is sys.stdout
+        for h in logger.handlers
+    ):
+        logger.addHandler(_SHARED_HANDLER)
     
-    # Add handler to logger
-    logger.addHandler(handler)
+    # The handler is attached here, so the root logger need not emit the record again
+    logger.propagate = False
     
     return logger